@@ -39,10 +39,14 @@ class Settings:
         self.max_participants_per_meeting = 10
         self.meeting_duration_hours = 24
         self.cleanup_interval_minutes = 60
+        self.cleanup_batch_size = 500  # Meetings deleted per cleanup statement batch
         
         # Logging Configuration
         self.log_level = "INFO"
         
+        # Health Check Configuration
+        self.health_check_strict = False  # True runs SELECT 1 instead of a pool checkout
+        
         # External API Configuration
         self.rate_limit_per_minute = 60
         
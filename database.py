@@ -1,7 +1,7 @@
 import os
-from sqlalchemy import create_engine, Column, String, DateTime, Boolean, JSON, Text
+from sqlalchemy import create_engine, Column, String, DateTime, Boolean, JSON, Text, Index, func, select
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, relationship, column_property
 from datetime import datetime, timedelta
 import uuid
 
@@ -12,12 +12,40 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./heydok.db")
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(DATABASE_URL)
+# Connection pool sizing for server databases; SQLite keeps its default pool
+engine_options = {}
+if not DATABASE_URL.startswith("sqlite"):
+    engine_options.update(
+        pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),  # below server idle timeout
+        pool_pre_ping=True
+    )
+
+# Larger compiled-statement cache for the prebuilt service queries
+engine = create_engine(DATABASE_URL, query_cache_size=1200, **engine_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Separate, smaller pool for scheduler jobs so they never compete with API requests
+background_engine_options = {}
+if not DATABASE_URL.startswith("sqlite"):
+    background_engine_options.update(
+        pool_size=int(os.getenv("DB_BACKGROUND_POOL_SIZE", "5")),
+        max_overflow=0,
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        pool_pre_ping=True
+    )
+
+background_engine = create_engine(DATABASE_URL, **background_engine_options)
+BackgroundSession = sessionmaker(autocommit=False, autoflush=False, bind=background_engine)
 Base = declarative_base()
 
 class Meeting(Base):
     __tablename__ = "meetings"
+    __table_args__ = (
+        Index("ix_meeting_expires_at", "expires_at"),
+        Index("ix_meeting_created_at", "created_at"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     meeting_id = Column(String, unique=True, nullable=False)
@@ -35,6 +63,23 @@ class Meeting(Base):
     last_patient_status = Column(String, nullable=True)
     last_status_update = Column(DateTime, nullable=True)
     meeting_metadata = Column(JSON, default=dict)
+    
+    # Read-only navigation; lazy="raise" turns accidental per-row loads (N+1)
+    # into errors, so bulk readers must opt in with selectinload()
+    documents = relationship(
+        "PatientDocument",
+        primaryjoin="Meeting.meeting_id == foreign(PatientDocument.meeting_id)",
+        back_populates="meeting",
+        viewonly=True,
+        lazy="raise"
+    )
+    media_tests = relationship(
+        "MediaTest",
+        primaryjoin="Meeting.meeting_id == foreign(MediaTest.meeting_id)",
+        back_populates="meeting",
+        viewonly=True,
+        lazy="raise"
+    )
 
 class PatientDocument(Base):
     __tablename__ = "patient_documents"
@@ -50,9 +95,21 @@ class PatientDocument(Base):
     upload_timestamp = Column(DateTime, default=datetime.utcnow)
     processed = Column(Boolean, default=False)
     status = Column(String, default="uploaded")
+    
+    meeting = relationship(
+        "Meeting",
+        primaryjoin="Meeting.meeting_id == foreign(PatientDocument.meeting_id)",
+        back_populates="documents",
+        viewonly=True,
+        lazy="raise"
+    )
 
 class MediaTest(Base):
     __tablename__ = "media_tests"
+    __table_args__ = (
+        Index("ix_mediatest_meeting_allowed", "meeting_id", "allowed_to_join"),
+        Index("ix_mediatest_meeting_ts", "meeting_id", "timestamp"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     test_id = Column(String, unique=True, nullable=False)
@@ -64,10 +121,38 @@ class MediaTest(Base):
     patient_confirmed = Column(Boolean, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
     allowed_to_join = Column(Boolean, default=False)
+    
+    meeting = relationship(
+        "Meeting",
+        primaryjoin="Meeting.meeting_id == foreign(MediaTest.meeting_id)",
+        back_populates="media_tests",
+        viewonly=True,
+        lazy="raise"
+    )
+
+# SQL-side child counts, deferred so they are only computed when a query
+# asks for them with undefer()
+Meeting.documents_count = column_property(
+    select(func.count(PatientDocument.id)).where(
+        PatientDocument.meeting_id == Meeting.meeting_id
+    ).correlate_except(PatientDocument).scalar_subquery(),
+    deferred=True
+)
+Meeting.media_tests_count = column_property(
+    select(func.count(MediaTest.id)).where(
+        MediaTest.meeting_id == Meeting.meeting_id
+    ).correlate_except(MediaTest).scalar_subquery(),
+    deferred=True
+)
 
 # Create tables
 Base.metadata.create_all(bind=engine)
 
+# create_all skips tables that already exist, so add any new indexes to them
+for table in Base.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -75,29 +160,3 @@ def get_db():
         yield db
     finally:
         db.close()
-
-# Cleanup expired meetings
-def cleanup_expired_meetings():
-    """Remove meetings older than 24 hours"""
-    db = SessionLocal()
-    try:
-        expired_meetings = db.query(Meeting).filter(
-            Meeting.expires_at < datetime.utcnow()
-        ).all()
-        
-        for meeting in expired_meetings:
-            # Delete related documents and media tests
-            db.query(PatientDocument).filter(
-                PatientDocument.meeting_id == meeting.meeting_id
-            ).delete()
-            
-            db.query(MediaTest).filter(
-                MediaTest.meeting_id == meeting.meeting_id
-            ).delete()
-            
-            db.delete(meeting)
-        
-        db.commit()
-        return len(expired_meetings)
-    finally:
-        db.close() 
\ No newline at end of file
@@ -1,4 +1,5 @@
 import os
+import functools
 import time
 from typing import Optional
 from livekit import api
@@ -7,6 +8,25 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+@functools.lru_cache(maxsize=1024)
+def _video_grants(room_name: str, is_host: bool) -> api.VideoGrants:
+    """Build the grants for a room/role once; the result is shared, so never mutate it"""
+    video_grants = api.VideoGrants(
+        room_join=True,
+        room=room_name,
+        can_publish=True,
+        can_subscribe=True,
+        can_publish_data=True,
+        can_publish_sources=["camera", "microphone", "screen_share"]  # Allow screen share for all participants
+    )
+    
+    # Add additional permissions for hosts
+    if is_host:
+        video_grants.room_admin = True
+        video_grants.room_record = True
+    
+    return video_grants
+
 class LiveKitClient:
     def __init__(self):
         self.url = os.getenv('LIVEKIT_URL')
@@ -32,23 +52,8 @@ class LiveKitClient:
             # Set participant identity and name
             token = token.with_identity(participant_name).with_name(participant_name)
             
-            # Create video grants
-            video_grants = api.VideoGrants(
-                room_join=True,
-                room=room_name,
-                can_publish=True,
-                can_subscribe=True,
-                can_publish_data=True,
-                can_publish_sources=["camera", "microphone", "screen_share"]  # Allow screen share for all participants
-            )
-            
-            # Add additional permissions for hosts
-            if is_host:
-                video_grants.room_admin = True
-                video_grants.room_record = True
-            
             # Add grants to token using the new API
-            token = token.with_grants(video_grants)
+            token = token.with_grants(_video_grants(room_name, is_host))
             
             # Generate JWT
             jwt_token = token.to_jwt()
@@ -10,22 +10,22 @@
 # - AWS_REGION: AWS region (default: eu-central-1)
 
 import os
-import random
-import string
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Literal
 import uuid
 import mimetypes
 from pathlib import Path
 import time
 import json
+import traceback
 import aiofiles
 import structlog
 from urllib.parse import quote_plus
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi import FastAPI, HTTPException, Depends, Request, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, JSONResponse, Response, RedirectResponse
 from fastapi.staticfiles import StaticFiles
@@ -34,6 +34,7 @@ import uvicorn
 import base64
 
 from livekit_client import LiveKitClient
+from utils.ids import random_id
 
 # Configure logging
 logging.basicConfig(
@@ -209,21 +210,23 @@ def get_insurance_card_service(db: Session = Depends(get_db)) -> InsuranceCardSe
     return InsuranceCardService(db)
 
 # Cleanup old meetings periodically (now using database)
-def cleanup_old_meetings():
+def cleanup_old_meetings(meeting_service: MeetingService):
     """Remove meetings older than 24 hours and related documents/tests"""
-    # Database cleanup is now handled by the cleanup function in database.py
-    from database import cleanup_expired_meetings
-    cleaned_count = cleanup_expired_meetings()
+    # Same batched cleanup the scheduler runs
+    cleaned_count = meeting_service.cleanup_expired_meetings()
     logger.info(f"Database cleanup completed: {cleaned_count} expired meetings removed")
 
 # Request/Response models
+ParticipantRole = Literal["doctor", "patient"]
+PatientStatus = Literal["link_created", "patient_active", "in_meeting"]
+
 class CreateMeetingRequest(BaseModel):
     host_name: str = Field(default="Host", min_length=1, max_length=50)
-    host_role: str = Field(default="doctor", pattern="^(doctor|patient)$")  # Fixed: regex -> pattern
+    host_role: ParticipantRole = "doctor"
 
 class JoinMeetingRequest(BaseModel):
     participant_name: str = Field(min_length=1, max_length=50)
-    participant_role: str = Field(default="patient", pattern="^(doctor|patient)$")  # Fixed: regex -> pattern
+    participant_role: ParticipantRole = "patient"
 
 class MeetingResponse(BaseModel):
     meeting_id: str
@@ -354,9 +357,8 @@ class PatientStatusRequest(BaseModel):
         description="👤 Name des Patienten",
         example="Max Mustermann"
     )
-    status: str = Field(
+    status: PatientStatus = Field(
         description="📊 Patient-Status",
-        pattern="^(link_created|patient_active|in_meeting)$",
         example="patient_active"
     )
     timestamp: Optional[str] = Field(
@@ -483,11 +485,8 @@ class InsuranceCardStatusResponse(BaseModel):
 
 def generate_meeting_id() -> str:
     """Generate a readable meeting ID format: xxx-yyyy-zzz"""
-    parts = []
-    for length in [3, 4, 3]:
-        part = ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
-        parts.append(part)
-    return '-'.join(parts)
+    raw = random_id(10)
+    return f"{raw[:3]}-{raw[3:7]}-{raw[7:]}"
 
 def get_base_url() -> str:
     """Get the base URL for the application"""
@@ -711,7 +710,7 @@ async def create_meeting(
     meeting_service: MeetingService = Depends(get_meeting_service)
 ):
     """Create a new meeting - typically called by doctors"""
-    cleanup_old_meetings()
+    cleanup_old_meetings(meeting_service)
     
     # Store meeting with correct parameters
     meeting = meeting_service.create_meeting(
@@ -724,7 +723,8 @@ async def create_meeting(
     
     # Generate doctor token with admin permissions
     doctor_display_name = f"Dr. {request.host_name}"
-    token = livekit_client.generate_token(
+    token = await run_in_threadpool(
+        livekit_client.generate_token,
         room_name=room_name,
         participant_name=doctor_display_name,
         is_host=True
@@ -775,7 +775,8 @@ async def join_meeting(
     room_name = livekit_client.get_room_name(meeting_id)
     
     # Generate participant token
-    token = livekit_client.generate_token(
+    token = await run_in_threadpool(
+        livekit_client.generate_token,
         room_name=room_name,
         participant_name=participant_name,
         is_host=False
@@ -1651,7 +1652,8 @@ async def patient_join_meeting(
     try:
         # Generate token for patient with limited permissions
         room_name = livekit_client.get_room_name(actual_meeting_id)
-        token = livekit_client.generate_token(
+        token = await run_in_threadpool(
+            livekit_client.generate_token,
             room_name=room_name,
             participant_name=f"Patient: {request.patient_name}",
             is_host=False
@@ -1774,7 +1776,8 @@ async def doctor_join_meeting(
         room_name = livekit_client.get_room_name(meeting_id)
         logger.info(f"🩺 Generating token for doctor: {doctor_display_name} in room: {room_name}")
         
-        token = livekit_client.generate_token(
+        token = await run_in_threadpool(
+            livekit_client.generate_token,
             room_name=room_name,
             participant_name=doctor_display_name,
             is_host=True
@@ -1814,7 +1817,6 @@ async def doctor_join_meeting(
     except Exception as e:
         logger.error(f"❌ Failed to generate token for doctor {request.participant_name}: {e}")
         logger.error(f"❌ Exception type: {type(e).__name__}")
-        import traceback
         logger.error(f"❌ Full traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail="Failed to join meeting")
 
@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 from database import PatientDocument
 from utils.exceptions import DocumentNotFoundError, DocumentProcessingError
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
@@ -126,7 +126,6 @@ class DocumentService:
     def cleanup_expired_documents(self, days: int = 30) -> int:
         """Clean up documents older than specified days"""
         try:
-            from datetime import timedelta
             cutoff_date = datetime.utcnow() - timedelta(days=days)
             
             expired_docs = self.db.query(PatientDocument).filter(
@@ -4,43 +4,123 @@ Advanced OCR service for German insurance cards using EasyOCR with optimized pre
 """
 import easyocr
 import cv2
+import functools
 import numpy as np
 import logging
 import uuid
 import io
+import mmap
 import re
 from datetime import datetime
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Tuple, BinaryIO, Union
 from sqlalchemy.orm import Session
 from PIL import Image, ImageEnhance, ImageFilter, ImageOps
 
 logger = logging.getLogger(__name__)
 
+# Insurance numbers (letter + 9 digits, or 10 digits with an optional letter)
+# and "Firstname [middle] Lastname" candidates in a single scan. A capital
+# followed by digits can only start a number and one followed by lowercase
+# only a name, so the alternatives never compete for the same text.
+_CARD_RE = re.compile(
+    r'(?P<ins>\b(?:[A-Z]\d{9}|[A-Z]?\d{10})\b)'
+    r'|(?P<name>[A-ZÄÖÜ][a-zäöüß]+(?:\s+[a-zäöüß]+)?\s+[A-ZÄÖÜ][a-zäöüß]+)'
+)
+
+# Insurers in priority order as (group, lowercase pattern, display name)
+_COMPANY_PATTERNS = (
+    ('aok', r'aok|a\.o\.k\.?', 'AOK'),
+    ('tk', r'tk|techniker', 'Techniker Krankenkasse'),
+    ('barmer', r'barmer', 'Barmer'),
+    ('dak', r'dak|dak-gesundheit', 'DAK-Gesundheit'),
+    ('ikk', r'ikk|innungskrankenkasse', 'IKK'),
+    ('hek', r'hek|hanseatische', 'HEK'),
+    ('kkh', r'kkh|kaufmännische', 'KKH'),
+    ('knappschaft', r'knappschaft', 'Knappschaft'),
+)
+# Wrapped in a lookahead so a match consumes nothing and every start position
+# is tried; overlapping or adjacent insurer tokens cannot hide each other
+_COMPANY_RE = re.compile(
+    '(?=' + '|'.join(f'(?P<{key}>{pattern})' for key, pattern, _ in _COMPANY_PATTERNS) + ')'
+)
+
+def _detect_company(text: str) -> str:
+    """Highest-priority insurer named in the text, or an empty string"""
+    found = {match.lastgroup for match in _COMPANY_RE.finditer(text.lower())}
+    return next((name for key, _, name in _COMPANY_PATTERNS if key in found), '')
+
+# Words that identify a candidate as an insurer rather than a person
+_NAME_STOPWORDS = frozenset(['aok', 'tk', 'barmer', 'dak', 'ikkk', 'techniker', 'knappschaft'])
+
+# Fields a card scan must yield to count as complete
+_ESSENTIAL_FIELDS = ('name', 'insurance_number', 'insurance_company')
+
+# Filters are immutable, so they are built once instead of on every image
+_UNSHARP_LIGHT = ImageFilter.UnsharpMask(radius=1, percent=150, threshold=1)
+_UNSHARP_ADAPTIVE = ImageFilter.UnsharpMask(radius=2, percent=200, threshold=2)
+_GAUSSIAN_SMOOTH = ImageFilter.GaussianBlur(radius=0.5)
+
+# PIL's SMOOTH kernel; ImageEnhance.Sharpness(2.0) is 2 * image - SMOOTH(image)
+_SMOOTH_KERNEL = np.array([[1, 1, 1],
+                           [1, 5, 1],
+                           [1, 1, 1]], dtype=np.float32) / 13
+
+def _to_gray_array(image: Image.Image) -> np.ndarray:
+    """Convert a PIL image to a C-contiguous grayscale uint8 array"""
+    if image.mode == 'L':
+        gray = np.asarray(image)
+    elif image.mode == 'RGB':
+        gray = cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2GRAY)
+    elif image.mode == 'RGBA':
+        gray = cv2.cvtColor(np.asarray(image), cv2.COLOR_RGBA2GRAY)
+    else:
+        gray = np.asarray(image.convert('L'))
+    
+    # OpenCV silently copies non-contiguous or non-uint8 input on every call;
+    # normalise the layout once here instead
+    if gray.dtype != np.uint8 or not gray.flags['C_CONTIGUOUS']:
+        gray = np.ascontiguousarray(gray, dtype=np.uint8)
+    
+    return gray
+
+def _enhance_contrast(gray: np.ndarray, factor: float) -> np.ndarray:
+    """OpenCV equivalent of PIL's ImageEnhance.Contrast on a grayscale array"""
+    # Single reduction; PIL averages a converted copy and blends with a
+    # full-size solid image
+    mean = int(cv2.mean(gray)[0] + 0.5)
+    return cv2.addWeighted(gray, factor, gray, 0, (1 - factor) * mean)
+
+@functools.lru_cache(maxsize=1)
+def _get_easyocr_reader() -> easyocr.Reader:
+    """Load the EasyOCR reader once per process (failed loads are retried)"""
+    return easyocr.Reader(['de', 'en'], gpu=False, verbose=False)
+
 class InsuranceCardService:
     """Enhanced service for processing German insurance cards with EasyOCR"""
     
-    # Class-level cached reader to avoid re-initialization
-    _cached_reader = None
-    
     def __init__(self, db: Session):
         self.db = db
         # Use cached reader or initialize new one
-        if InsuranceCardService._cached_reader is None:
+        first_load = _get_easyocr_reader.cache_info().currsize == 0
+        if first_load:
             logger.info("🚀 Initializing EasyOCR Reader (first time)...")
-            try:
-                InsuranceCardService._cached_reader = easyocr.Reader(['de', 'en'], gpu=False, verbose=False)
-                logger.info("✅ EasyOCR Reader initialized and cached successfully")
-            except Exception as e:
-                logger.error(f"❌ Failed to initialize EasyOCR: {e}")
-                InsuranceCardService._cached_reader = None
         else:
             logger.info("⚡ Using cached EasyOCR Reader (fast startup)")
         
-        self.reader = InsuranceCardService._cached_reader
+        try:
+            self.reader = _get_easyocr_reader()
+            if first_load:
+                logger.info("✅ EasyOCR Reader initialized and cached successfully")
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize EasyOCR: {e}")
+            self.reader = None
     
-    def extract_card_data(self, image_bytes: bytes) -> Dict[str, Any]:
+    def extract_card_data(self, image_data: Union[bytes, mmap.mmap, BinaryIO]) -> Dict[str, Any]:
         """
         Extract data from insurance card image using EasyOCR with advanced preprocessing
+        
+        image_data is the encoded image as bytes, or a seekable buffer such as an
+        mmap or open binary file, which is decoded in place without a copy
         """
         if not self.reader:
             return {
@@ -51,10 +131,15 @@ class InsuranceCardService:
             }
 
         try:
-            logger.info(f"Starting EasyOCR processing, image size: {len(image_bytes)} bytes")
+            if isinstance(image_data, (bytes, bytearray, mmap.mmap)):
+                logger.info(f"Starting EasyOCR processing, image size: {len(image_data)} bytes")
+            else:
+                logger.info("Starting EasyOCR processing from a file object")
             
-            # Convert bytes to PIL Image
-            image = Image.open(io.BytesIO(image_bytes))
+            # Convert bytes to PIL Image; file-like buffers such as mmap are
+            # read in place instead of being copied into a BytesIO
+            source = image_data if hasattr(image_data, "seek") else io.BytesIO(image_data)
+            image = Image.open(source)
             logger.info(f"PIL Image loaded: {image.size}, mode: {image.mode}")
             
             # Apply multi-approach EasyOCR processing
@@ -132,50 +217,66 @@ class InsuranceCardService:
             }
         ]
         
+        # Approaches run one after another: readtext already uses every core
+        # through torch's intra-op threads, so running them side by side only
+        # oversubscribes the CPU and multiplies peak memory. Once the text read
+        # so far yields all essential fields the remaining approaches are skipped
         results = []
-        
-        for approach in approaches:
-            try:
-                logger.info(f"Applying EasyOCR approach: {approach['name']}")
-                
-                # Apply preprocessing
-                processed_image = approach['method'](image)
-                
-                # Convert PIL to numpy array for EasyOCR
-                img_array = np.array(processed_image)
-                
-                # Run EasyOCR
-                detections = self.reader.readtext(img_array, detail=1)
-                
-                if detections:
-                    # Calculate average confidence
-                    confidences = [det[2] for det in detections if det[2] > 0.1]
-                    avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
-                    
-                    # Extract all text
-                    extracted_text = ' '.join([det[1] for det in detections if det[2] > 0.1])
-                    
-                    result = {
-                        'approach': approach['name'],
-                        'detections': detections,
-                        'extracted_text': extracted_text,
-                        'avg_confidence': avg_confidence,
-                        'text_count': len([det for det in detections if det[2] > 0.1])
-                    }
-                    
-                    results.append(result)
-                    logger.info(f"Approach {approach['name']}: {len(detections)} detections, "
-                              f"avg confidence: {avg_confidence:.3f}")
-                else:
-                    logger.warning(f"No detections from approach: {approach['name']}")
-                    
-            except Exception as e:
-                logger.warning(f"Approach {approach['name']} failed: {e}")
+        for done, approach in enumerate(approaches, 1):
+            result = self._run_approach(approach, image)
+            if not result:
                 continue
+            results.append(result)
+            
+            if self._has_complete_data(results):
+                logger.info(f"All essential fields found after {done} approaches, "
+                          f"skipping the remaining {len(approaches) - done}")
+                break
         
         return results
     
-    def _preprocess_enhanced_contrast(self, image: Image.Image) -> Image.Image:
+    def _run_approach(self, approach: Dict[str, Any], image: Image.Image) -> Optional[Dict[str, Any]]:
+        """Preprocess the image with one approach and run EasyOCR on it"""
+        try:
+            logger.info(f"Applying EasyOCR approach: {approach['name']}")
+            
+            # Apply preprocessing
+            img_array = approach['method'](image)
+            
+            # Run EasyOCR (accepts the preprocessed array directly)
+            detections = self.reader.readtext(img_array, detail=1)
+            
+            if not detections:
+                logger.warning(f"No detections from approach: {approach['name']}")
+                return None
+            
+            # Collect text and confidence of the usable detections in one pass
+            texts = []
+            confidence_sum = 0.0
+            for _, text, confidence in detections:
+                if confidence > 0.1:
+                    texts.append(text)
+                    confidence_sum += confidence
+            
+            avg_confidence = confidence_sum / len(texts) if texts else 0.0
+            extracted_text = ' '.join(texts)
+            
+            logger.info(f"Approach {approach['name']}: {len(detections)} detections, "
+                      f"avg confidence: {avg_confidence:.3f}")
+            
+            return {
+                'approach': approach['name'],
+                'detections': detections,
+                'extracted_text': extracted_text,
+                'avg_confidence': avg_confidence,
+                'text_count': len(texts)
+            }
+            
+        except Exception as e:
+            logger.warning(f"Approach {approach['name']} failed: {e}")
+            return None
+    
+    def _preprocess_enhanced_contrast(self, image: Image.Image) -> np.ndarray:
         """Enhanced contrast preprocessing for clear text recognition"""
         # Convert to grayscale
         if image.mode != 'L':
@@ -190,11 +291,11 @@ class InsuranceCardService:
         image = enhancer.enhance(2.5)
         
         # Apply slight sharpening
-        image = image.filter(ImageFilter.UnsharpMask(radius=1, percent=150, threshold=1))
+        image = image.filter(_UNSHARP_LIGHT)
         
-        return image
+        return np.asarray(image)
     
-    def _preprocess_gaussian_smooth(self, image: Image.Image) -> Image.Image:
+    def _preprocess_gaussian_smooth(self, image: Image.Image) -> np.ndarray:
         """Gaussian smoothing for noise reduction"""
         # Convert to grayscale
         if image.mode != 'L':
@@ -202,18 +303,15 @@ class InsuranceCardService:
         
         # Moderate resolution increase
         width, height = image.size
-        image = image.resize((width * 1.5, height * 1.5), Image.LANCZOS)
+        image = image.resize((width * 3 // 2, height * 3 // 2), Image.LANCZOS)
         
         # Apply Gaussian blur to reduce noise
-        image = image.filter(ImageFilter.GaussianBlur(radius=0.5))
+        image = image.filter(_GAUSSIAN_SMOOTH)
         
         # Moderate contrast enhancement
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(1.8)
-        
-        return image
+        return _enhance_contrast(np.asarray(image), 1.8)
     
-    def _preprocess_adaptive_sharp(self, image: Image.Image) -> Image.Image:
+    def _preprocess_adaptive_sharp(self, image: Image.Image) -> np.ndarray:
         """Adaptive sharpening for text clarity"""
         # Convert to grayscale
         if image.mode != 'L':
@@ -223,20 +321,22 @@ class InsuranceCardService:
         width, height = image.size
         image = image.resize((width * 2, height * 2), Image.LANCZOS)
         
-        # Apply adaptive sharpening
-        image = image.filter(ImageFilter.UnsharpMask(radius=2, percent=200, threshold=2))
+        # Apply adaptive sharpening (PIL keeps the threshold and its own blur)
+        gray = _to_gray_array(image.filter(_UNSHARP_ADAPTIVE))
         
-        # Enhance sharpness
-        enhancer = ImageEnhance.Sharpness(image)
-        image = enhancer.enhance(2.0)
+        # Enhance sharpness; like PIL, the rounded smoothed image is blended
+        # back and the one-pixel border is left unfiltered
+        smooth = cv2.filter2D(gray, -1, _SMOOTH_KERNEL)
+        smooth[[0, -1], :] = gray[[0, -1], :]
+        smooth[:, [0, -1]] = gray[:, [0, -1]]
+        gray = cv2.addWeighted(gray, 2.0, smooth, -1.0, 0)
         
         # Final contrast boost
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(1.6)
+        gray = _enhance_contrast(gray, 1.6)
         
-        return image
+        return gray
     
-    def _preprocess_high_resolution(self, image: Image.Image) -> Image.Image:
+    def _preprocess_high_resolution(self, image: Image.Image) -> np.ndarray:
         """High resolution enhancement for small text"""
         # Convert to grayscale
         if image.mode != 'L':
@@ -247,14 +347,10 @@ class InsuranceCardService:
         image = image.resize((width * 3, height * 3), Image.LANCZOS)
         
         # Brightness adjustment
-        enhancer = ImageEnhance.Brightness(image)
-        image = enhancer.enhance(1.1)
+        gray = cv2.convertScaleAbs(np.asarray(image), alpha=1.1)
         
         # Moderate contrast
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(1.5)
-        
-        return image
+        return _enhance_contrast(gray, 1.5)
     
     def _combine_all_text(self, results: List[Dict[str, Any]]) -> str:
         """Combine text from all approaches for comprehensive parsing"""
@@ -270,6 +366,16 @@ class InsuranceCardService:
     
     def _parse_german_insurance_card(self, combined_text: str, best_detections: List) -> Dict[str, str]:
         """Parse German insurance card data with enhanced pattern recognition"""
+        data = self._extract_insurance_fields(combined_text)
+        
+        # Log extraction results
+        found_fields = {k: v for k, v in data.items() if v}
+        logger.info(f"Extracted insurance data: {found_fields}")
+        
+        return data
+    
+    def _extract_insurance_fields(self, combined_text: str) -> Dict[str, str]:
+        """Pull the card fields out of OCR text without logging them"""
         data = {
             'name': '',
             'insurance_number': '',
@@ -281,61 +387,28 @@ class InsuranceCardService:
         if not combined_text:
             return data
         
-        # Clean and prepare text
-        text_clean = re.sub(r'\s+', ' ', combined_text).strip()
-        
-        # Enhanced name extraction with German patterns
-        name_patterns = [
-            r'([A-ZÄÖÜ][a-zäöüß]+(?:\s+[a-zäöüß]+)?\s+[A-ZÄÖÜ][a-zäöüß]+)',  # German names with optional middle names
-            r'([A-Z][a-z]+(?:\s+[a-z]+)?\s+[A-Z][a-z]+)',  # Without umlauts
-        ]
+        # Clean and prepare text (collapse whitespace runs in one C-level pass)
+        text_clean = ' '.join(combined_text.split())
         
-        for pattern in name_patterns:
-            matches = re.findall(pattern, text_clean)
-            for match in matches:
+        # Enhanced name and insurance number extraction
+        for match in _CARD_RE.finditer(text_clean):
+            if match.lastgroup == 'ins':
+                if not data['insurance_number']:
+                    data['insurance_number'] = match.group('ins')
+            elif not data['name']:
                 # Validate it's a real name (not company, etc.)
-                if (len(match.split()) >= 2 and 
-                    len(match) <= 50 and 
-                    not re.search(r'\d', match) and
-                    not any(company.lower() in match.lower() for company in 
-                           ['aok', 'tk', 'barmer', 'dak', 'ikkk', 'techniker', 'knappschaft'])):
-                    data['name'] = match.strip()
-                    break
-            if data['name']:
+                candidate = match.group('name')
+                words = candidate.lower().split()
+                if (len(words) >= 2 and
+                    len(candidate) <= 50 and
+                    _NAME_STOPWORDS.isdisjoint(words)):
+                    data['name'] = candidate.strip()
+            
+            if data['name'] and data['insurance_number']:
                 break
         
-        # Enhanced insurance number extraction
-        number_patterns = [
-            r'\b([A-Z]?\d{10})\b',  # 10-digit with optional prefix
-            r'\b(\d{10})\b',        # Exactly 10 digits
-            r'\b([A-Z]\d{9})\b',    # Letter + 9 digits
-        ]
-        
-        for pattern in number_patterns:
-            match = re.search(pattern, text_clean)
-            if match:
-                number = match.group(1)
-                # Validate it looks like an insurance number
-                if len(number) >= 9:
-                    data['insurance_number'] = number
-                    break
-        
         # Enhanced German insurance company detection
-        company_patterns = [
-            (r'(?:AOK|A\.O\.K\.?)', 'AOK'),
-            (r'(?:TK|Techniker|TECHNIKER)', 'Techniker Krankenkasse'),
-            (r'(?:BARMER|Barmer)', 'Barmer'),
-            (r'(?:DAK|DAK-Gesundheit)', 'DAK-Gesundheit'),
-            (r'(?:IKK|Innungskrankenkasse)', 'IKK'),
-            (r'(?:HEK|Hanseatische)', 'HEK'),
-            (r'(?:KKH|Kaufmännische)', 'KKH'),
-            (r'(?:Knappschaft)', 'Knappschaft'),
-        ]
-        
-        for pattern, name in company_patterns:
-            if re.search(pattern, text_clean, re.IGNORECASE):
-                data['insurance_company'] = name
-                break
+        data['insurance_company'] = _detect_company(text_clean)
         
         # Date extraction
         date_patterns = [
@@ -354,16 +427,18 @@ class InsuranceCardService:
             if len(dates_found) > 1:
                 data['birth_date'] = dates_found[0]
         
-        # Log extraction results
-        found_fields = {k: v for k, v in data.items() if v}
-        logger.info(f"Extracted insurance data: {found_fields}")
-        
         return data
     
+    def _has_complete_data(self, results: List[Dict[str, Any]]) -> bool:
+        """Check if the approaches run so far already yield all essential fields"""
+        # Parsed silently: this runs after every approach and the fields are PII
+        combined_text = ' '.join(result['extracted_text'] for result in results if result.get('extracted_text'))
+        data = self._extract_insurance_fields(combined_text)
+        return all(data.get(field) for field in _ESSENTIAL_FIELDS)
+    
     def _has_meaningful_data(self, data: Dict[str, str]) -> bool:
         """Check if extracted data contains meaningful insurance information"""
-        essential_fields = ['name', 'insurance_number', 'insurance_company']
-        found_essential = sum(1 for field in essential_fields if data.get(field))
+        found_essential = sum(1 for field in _ESSENTIAL_FIELDS if data.get(field))
         
         # At least 2 out of 3 essential fields should be found
         return found_essential >= 2
@@ -2,15 +2,29 @@
 Media Test Service for handling patient media test operations
 """
 from typing import Optional, List
+from sqlalchemy import bindparam, exists, select
 from sqlalchemy.orm import Session
 from database import MediaTest
 from utils.exceptions import MediaTestNotFoundError, MediaTestProcessingError
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Hot-path statements built once with bound parameters (compiled statement cache)
+_GET_MEDIA_TEST_STMT = select(MediaTest).where(MediaTest.test_id == bindparam("test_id"))
+
+_SUCCESSFUL_MEDIA_TEST_STMT = select(
+    exists().where(
+        MediaTest.meeting_id == bindparam("meeting_id"),
+        MediaTest.allowed_to_join == True
+    )
+)
+
+# Attributes update_media_test may write
+_MEDIA_TEST_COLUMNS = frozenset(column.key for column in MediaTest.__table__.columns)
+
 class MediaTestService:
     """Service for managing patient media tests"""
     
@@ -56,9 +70,9 @@ class MediaTestService:
     def get_media_test(self, test_id: str) -> Optional[MediaTest]:
         """Get a media test by ID"""
         try:
-            return self.db.query(MediaTest).filter(
-                MediaTest.test_id == test_id
-            ).first()
+            return self.db.execute(
+                _GET_MEDIA_TEST_STMT, {"test_id": test_id}
+            ).scalar_one_or_none()
         except Exception as e:
             logger.error(f"Error getting media test {test_id}: {e}")
             return None
@@ -86,11 +100,9 @@ class MediaTestService:
     def has_successful_media_test(self, meeting_id: str) -> bool:
         """Check if a meeting has a successful media test"""
         try:
-            test = self.db.query(MediaTest).filter(
-                MediaTest.meeting_id == meeting_id,
-                MediaTest.allowed_to_join == True
-            ).first()
-            return test is not None
+            return bool(self.db.execute(
+                _SUCCESSFUL_MEDIA_TEST_STMT, {"meeting_id": meeting_id}
+            ).scalar())
         except Exception as e:
             logger.error(f"Error checking media test for meeting {meeting_id}: {e}")
             return False
@@ -102,13 +114,21 @@ class MediaTestService:
     ) -> bool:
         """Update a media test"""
         try:
-            media_test = self.get_media_test(test_id)
-            if not media_test:
-                raise MediaTestNotFoundError(f"Media test {test_id} not found")
+            values = {
+                key: value for key, value in kwargs.items()
+                if key in _MEDIA_TEST_COLUMNS
+            }
+            
+            # Single UPDATE without loading the row first
+            if values:
+                updated = self.db.query(MediaTest).filter(
+                    MediaTest.test_id == test_id
+                ).update(values, synchronize_session=False)
+            else:
+                updated = self.get_media_test(test_id) is not None
             
-            for key, value in kwargs.items():
-                if hasattr(media_test, key):
-                    setattr(media_test, key, value)
+            if not updated:
+                raise MediaTestNotFoundError(f"Media test {test_id} not found")
             
             self.db.commit()
             logger.info(f"Media test updated: {test_id}")
@@ -139,16 +159,12 @@ class MediaTestService:
     def cleanup_expired_media_tests(self, days: int = 30) -> int:
         """Clean up media tests older than specified days"""
         try:
-            from datetime import timedelta
             cutoff_date = datetime.utcnow() - timedelta(days=days)
             
-            expired_tests = self.db.query(MediaTest).filter(
+            # Single DELETE; no rows are loaded into the session
+            count = self.db.query(MediaTest).filter(
                 MediaTest.timestamp < cutoff_date
-            ).all()
-            
-            count = len(expired_tests)
-            for test in expired_tests:
-                self.db.delete(test)
+            ).delete(synchronize_session=False)
             
             self.db.commit()
             logger.info(f"Cleaned up {count} expired media tests")
@@ -1,7 +1,9 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from fastapi import Depends
+from sqlalchemy.orm import Session, undefer
+from sqlalchemy import and_, bindparam, func, select
+from sqlalchemy.exc import IntegrityError
 
 from database import Meeting, PatientDocument, MediaTest, get_db
 from utils.exceptions import (
@@ -10,12 +12,29 @@ from utils.exceptions import (
     MeetingFullError,
     ValidationError
 )
+from utils.ids import random_id
 from utils.logger import get_logger
 from config import get_settings
 
 logger = get_logger(__name__)
 settings = get_settings()
 
+# Attempts at inserting a meeting before an ID collision is treated as an error
+_MEETING_ID_ATTEMPTS = 3
+
+# Hot-path statements are built once with bound parameters so each call only
+# binds values and reuses the compiled SQL from the engine's statement cache
+_GET_MEETING_STMT = select(Meeting).where(Meeting.meeting_id == bindparam("meeting_id"))
+
+_MEETING_STATUS_STMT = select(Meeting).options(
+    undefer(Meeting.documents_count),
+    undefer(Meeting.media_tests_count)
+).where(Meeting.meeting_id == bindparam("meeting_id"))
+
+_EXPIRED_MEETING_IDS_STMT = select(Meeting.meeting_id).where(
+    Meeting.expires_at < bindparam("now")
+).limit(bindparam("batch_size"))
+
 class MeetingService:
     """Service for managing meetings with business logic"""
     
@@ -30,21 +49,33 @@ class MeetingService:
     ) -> Meeting:
         """Create a new meeting"""
         
-        # Generate unique meeting ID
-        meeting_id = self._generate_meeting_id()
-        
-        # Create meeting record
-        meeting = Meeting(
-            meeting_id=meeting_id,
-            host_name=host_name,
-            host_role=host_role,
-            external_id=external_id,
-            created_at=datetime.utcnow(),
-            expires_at=datetime.utcnow() + timedelta(hours=settings.meeting_duration_hours)
-        )
+        now = datetime.utcnow()
+        
+        # IDs carry enough entropy that collisions are practically impossible;
+        # the unique constraint catches one anyway and we retry with a new ID
+        for attempt in range(_MEETING_ID_ATTEMPTS):
+            meeting_id = self._generate_meeting_id()
+            
+            # Create meeting record
+            meeting = Meeting(
+                meeting_id=meeting_id,
+                host_name=host_name,
+                host_role=host_role,
+                external_id=external_id,
+                created_at=now,
+                expires_at=now + timedelta(hours=settings.meeting_duration_hours)
+            )
+            
+            self.db.add(meeting)
+            try:
+                self.db.commit()
+                break
+            except IntegrityError:
+                self.db.rollback()
+                if attempt == _MEETING_ID_ATTEMPTS - 1:
+                    raise
+                logger.warning(f"Meeting ID collision on {meeting_id}, retrying")
         
-        self.db.add(meeting)
-        self.db.commit()
         self.db.refresh(meeting)
         
         logger.info(
@@ -62,9 +93,9 @@ class MeetingService:
     def get_meeting(self, meeting_id: str, check_expired: bool = True) -> Meeting:
         """Get meeting by ID with optional expiration check"""
         
-        meeting = self.db.query(Meeting).filter(
-            Meeting.meeting_id == meeting_id
-        ).first()
+        meeting = self.db.execute(
+            _GET_MEETING_STMT, {"meeting_id": meeting_id}
+        ).scalar_one_or_none()
         
         if not meeting:
             raise MeetingNotFoundError(meeting_id)
@@ -77,17 +108,17 @@ class MeetingService:
     def get_meeting_status(self, meeting_id: str) -> Dict[str, Any]:
         """Get comprehensive meeting status"""
         
-        meeting = self.get_meeting(meeting_id)
+        # Fetch the meeting together with its document and media test counts
+        # in a single roundtrip via correlated scalar subqueries
+        meeting = self.db.execute(
+            _MEETING_STATUS_STMT, {"meeting_id": meeting_id}
+        ).scalar_one_or_none()
         
-        # Count documents
-        doc_count = self.db.query(PatientDocument).filter(
-            PatientDocument.meeting_id == meeting_id
-        ).count()
+        if not meeting:
+            raise MeetingNotFoundError(meeting_id)
         
-        # Count media tests
-        test_count = self.db.query(MediaTest).filter(
-            MediaTest.meeting_id == meeting_id
-        ).count()
+        if meeting.expires_at < datetime.utcnow():
+            raise MeetingExpiredError(meeting_id)
         
         return {
             "meeting_id": meeting.meeting_id,
@@ -96,9 +127,9 @@ class MeetingService:
             "patient_joined": meeting.patient_joined,
             "patient_setup_completed": meeting.patient_setup_completed,
             "document_uploaded": meeting.document_uploaded,
-            "documents_count": doc_count,
+            "documents_count": meeting.documents_count,
             "media_test_completed": meeting.media_test_completed,
-            "media_tests_count": test_count,
+            "media_tests_count": meeting.media_tests_count,
             "meeting_active": meeting.meeting_active,
             "created_at": meeting.created_at.isoformat(),
             "expires_at": meeting.expires_at.isoformat(),
@@ -112,27 +143,26 @@ class MeetingService:
         meeting_id: str, 
         patient_name: Optional[str] = None,
         status: Optional[str] = None
-    ) -> Meeting:
+    ) -> None:
         """Update patient status in meeting"""
         
-        meeting = self.get_meeting(meeting_id)
+        flags: Dict[str, Any] = {}
         
         # Update fields if provided
         if patient_name:
-            meeting.patient_name = patient_name
+            flags["patient_name"] = patient_name
         
         if status:
-            meeting.last_patient_status = status
-            meeting.last_status_update = datetime.utcnow()
+            flags["last_patient_status"] = status
+            flags["last_status_update"] = datetime.utcnow()
             
             # Update meeting flags based on status
             if status == "patient_active":
-                meeting.patient_joined = True
+                flags["patient_joined"] = True
             elif status == "in_meeting":
-                meeting.meeting_active = True
+                flags["meeting_active"] = True
         
-        self.db.commit()
-        self.db.refresh(meeting)
+        self._set_flags(meeting_id, **flags)
         
         logger.info(
             f"Patient status updated",
@@ -142,41 +172,18 @@ class MeetingService:
                 "status": status
             }
         )
-        
-        return meeting
     
-    def mark_patient_setup_completed(self, meeting_id: str) -> Meeting:
+    def mark_patient_setup_completed(self, meeting_id: str) -> None:
         """Mark patient setup as completed"""
-        
-        meeting = self.get_meeting(meeting_id)
-        meeting.patient_setup_completed = True
-        
-        self.db.commit()
-        self.db.refresh(meeting)
-        
-        return meeting
+        self._set_flags(meeting_id, patient_setup_completed=True)
     
-    def mark_document_uploaded(self, meeting_id: str) -> Meeting:
+    def mark_document_uploaded(self, meeting_id: str) -> None:
         """Mark document as uploaded"""
-        
-        meeting = self.get_meeting(meeting_id)
-        meeting.document_uploaded = True
-        
-        self.db.commit()
-        self.db.refresh(meeting)
-        
-        return meeting
+        self._set_flags(meeting_id, document_uploaded=True)
     
-    def mark_media_test_completed(self, meeting_id: str) -> Meeting:
+    def mark_media_test_completed(self, meeting_id: str) -> None:
         """Mark media test as completed"""
-        
-        meeting = self.get_meeting(meeting_id)
-        meeting.media_test_completed = True
-        
-        self.db.commit()
-        self.db.refresh(meeting)
-        
-        return meeting
+        self._set_flags(meeting_id, media_test_completed=True)
     
     def update_meeting(self, meeting_id: str, **kwargs) -> Meeting:
         """Update meeting with arbitrary fields"""
@@ -200,6 +207,20 @@ class MeetingService:
             Meeting.expires_at > datetime.utcnow()
         ).limit(limit).all()
     
+    def count_active(self) -> int:
+        """Count active (non-expired) meetings in SQL"""
+        
+        return self.db.query(func.count(Meeting.id)).filter(
+            Meeting.expires_at > datetime.utcnow()
+        ).scalar()
+    
+    def count_created_since(self, since: datetime) -> int:
+        """Count meetings created at or after the given time"""
+        
+        return self.db.query(func.count(Meeting.id)).filter(
+            Meeting.created_at >= since
+        ).scalar()
+    
     def get_total_meetings_count(self) -> int:
         """Get total count of all meetings"""
         
@@ -215,54 +236,67 @@ class MeetingService:
     def cleanup_expired_meetings(self) -> int:
         """Clean up expired meetings and return count"""
         
-        expired_meetings = self.db.query(Meeting).filter(
-            Meeting.expires_at < datetime.utcnow()
-        ).all()
-        
+        now = datetime.utcnow()
+        batch_size = settings.cleanup_batch_size
         count = 0
-        for meeting in expired_meetings:
+        
+        # Delete in bounded batches with bulk statements instead of loading and
+        # deleting every meeting through the ORM
+        while True:
+            expired_ids = self.db.execute(
+                _EXPIRED_MEETING_IDS_STMT, {"now": now, "batch_size": batch_size}
+            ).scalars().all()
+            
+            if not expired_ids:
+                break
+            
             # Delete related documents
             self.db.query(PatientDocument).filter(
-                PatientDocument.meeting_id == meeting.meeting_id
-            ).delete()
+                PatientDocument.meeting_id.in_(expired_ids)
+            ).delete(synchronize_session=False)
             
             # Delete related media tests
             self.db.query(MediaTest).filter(
-                MediaTest.meeting_id == meeting.meeting_id
-            ).delete()
+                MediaTest.meeting_id.in_(expired_ids)
+            ).delete(synchronize_session=False)
             
-            # Delete meeting
-            self.db.delete(meeting)
-            count += 1
-        
-        self.db.commit()
+            # Delete meetings
+            self.db.query(Meeting).filter(
+                Meeting.meeting_id.in_(expired_ids)
+            ).delete(synchronize_session=False)
+            
+            self.db.commit()
+            count += len(expired_ids)
+            
+            if len(expired_ids) < batch_size:
+                break
         
         if count > 0:
             logger.info(f"Cleaned up {count} expired meetings")
         
         return count
     
+    def _set_flags(self, meeting_id: str, **flags) -> int:
+        """Write meeting columns with one UPDATE instead of fetch/commit/refresh"""
+        
+        updated = 0
+        if flags:
+            updated = self.db.query(Meeting).filter(
+                Meeting.meeting_id == meeting_id,
+                Meeting.expires_at >= datetime.utcnow()
+            ).update(flags, synchronize_session=False)
+            self.db.commit()
+        
+        if not updated:
+            # Nothing matched: let get_meeting raise the not-found/expired error
+            self.get_meeting(meeting_id)
+        
+        return updated
+    
     def _generate_meeting_id(self) -> str:
-        """Generate unique meeting ID"""
-        import random
-        import string
-        
-        while True:
-            # Generate random ID
-            meeting_id = 'mtg_' + ''.join(
-                random.choices(string.ascii_lowercase + string.digits, k=12)
-            )
-            
-            # Check if it exists
-            existing = self.db.query(Meeting).filter(
-                Meeting.meeting_id == meeting_id
-            ).first()
-            
-            if not existing:
-                return meeting_id
+        """Generate random meeting ID (uniqueness is enforced by the database)"""
+        return 'mtg_' + random_id(12)
 
-def get_meeting_service(db: Session = None) -> MeetingService:
-    """Factory function to get meeting service"""
-    if db is None:
-        db = next(get_db())
+def get_meeting_service(db: Session = Depends(get_db)) -> MeetingService:
+    """FastAPI dependency; non-HTTP callers should wrap a SessionLocal() in a with block"""
     return MeetingService(db) 
\ No newline at end of file
@@ -1,19 +1,25 @@
 import os
-import random
-import string
+import asyncio
+import functools
 import logging
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Literal, Optional
 import uuid
 
 from fastapi import FastAPI, HTTPException, Request, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 import uvicorn
+from cachetools import TTLCache
 
 from livekit_client import LiveKitClient
+from utils.ids import random_id
 
 # Configure logging
 logging.basicConfig(
@@ -25,11 +31,31 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# LiveKit client, set up by lifespan(); None until then or if setup failed
+livekit: Optional[LiveKitClient] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize the LiveKit client off the import path"""
+    global livekit
+    try:
+        client = await asyncio.to_thread(LiveKitClient)
+        if await asyncio.to_thread(client.validate_credentials):
+            livekit = client
+            logger.info("LiveKit client initialized and validated successfully")
+        else:
+            logger.error("LiveKit credentials validation failed")
+    except Exception as e:
+        logger.error(f"Failed to initialize LiveKit client: {e}")
+    
+    yield
+
 # Initialize FastAPI app
 app = FastAPI(
     title="🏥 HeyDok Video - Simple Version",
     description="Simplified video meeting app for testing",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -48,25 +74,37 @@ try:
 except Exception as e:
     logger.warning(f"Could not mount static files: {e}")
 
-# Initialize LiveKit client
-try:
-    livekit = LiveKitClient()
-    if livekit.validate_credentials():
-        logger.info("LiveKit client initialized and validated successfully")
-    else:
-        logger.error("LiveKit credentials validation failed")
-        raise Exception("Invalid LiveKit credentials")
-except Exception as e:
-    logger.error(f"Failed to initialize LiveKit client: {e}")
-    livekit = None
+# In-memory storage for meetings, bounded and self-expiring
+MAX_MEETINGS = 10_000
+MEETING_TTL_SECONDS = 24 * 3600
+MAX_PARTICIPANTS_TRACKED = 50
+
+@dataclass(slots=True)
+class SimpleMeeting:
+    meeting_id: str
+    created_at: str
+    participants: dict[str, dict] = field(default_factory=dict)  # keyed by participant name
 
-# In-memory storage for meetings
-meetings: Dict[str, dict] = {}
+    def add_participant(self, participant_info: dict) -> None:
+        """Add or refresh a participant, dropping the oldest beyond the cap"""
+        name = participant_info["name"]
+        self.participants.pop(name, None)
+        if len(self.participants) >= MAX_PARTICIPANTS_TRACKED:
+            del self.participants[next(iter(self.participants))]
+        self.participants[name] = participant_info
+
+meetings: TTLCache = TTLCache(maxsize=MAX_MEETINGS, ttl=MEETING_TTL_SECONDS)
+meetings_lock = threading.Lock()
+
+def get_meeting(meeting_id: str) -> Optional[SimpleMeeting]:
+    """Look up a live meeting"""
+    with meetings_lock:
+        return meetings.get(meeting_id)
 
 # Pydantic models
 class JoinMeetingRequest(BaseModel):
     participant_name: str = Field(min_length=1, max_length=50)
-    participant_role: str = Field(default="patient", pattern="^(doctor|patient)$")
+    participant_role: Literal["doctor", "patient"] = "patient"
 
 class MeetingResponse(BaseModel):
     meeting_id: str
@@ -76,19 +114,8 @@ class MeetingResponse(BaseModel):
     participants_count: int = 0
     user_role: str
 
-def generate_meeting_id() -> str:
-    """Generate a unique meeting ID"""
-    return ''.join(random.choices(string.ascii_lowercase + string.digits, k=12))
-
-def get_livekit_client() -> LiveKitClient:
-    if not livekit:
-        raise HTTPException(status_code=503, detail="LiveKit service unavailable")
-    return livekit
-
-@app.get("/", response_class=HTMLResponse)
-async def homepage():
-    """Simple homepage with meeting creation"""
-    return HTMLResponse(content="""
+# Static pages, encoded once at import
+_HOMEPAGE_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -141,7 +168,46 @@ async def homepage():
         </script>
     </body>
     </html>
-    """)
+    """
+_HOMEPAGE_BYTES = _HOMEPAGE_HTML.encode("utf-8")
+_HOMEPAGE_HEADERS = {
+    "content-type": "text/html; charset=utf-8",
+    "cache-control": "public, max-age=300"
+}
+
+_NOT_FOUND_TEMPLATE = """
+            <html>
+            <head><title>Meeting nicht gefunden</title></head>
+            <body style="font-family: Arial; text-align: center; padding: 50px;">
+                <h1>❌ Meeting nicht gefunden</h1>
+                <p>Meeting ID: {meeting_id}</p>
+                <p>Das Meeting existiert nicht oder ist abgelaufen.</p>
+                <a href="/" style="background: #4285f4; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">
+                    Zur Homepage
+                </a>
+            </body>
+            </html>
+            """
+
+@functools.lru_cache(maxsize=None)
+def read_frontend_file(path: str) -> str:
+    """Read a frontend asset from disk once and keep it in memory"""
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+def generate_meeting_id() -> str:
+    """Generate a unique meeting ID"""
+    return random_id(12)
+
+def get_livekit_client() -> LiveKitClient:
+    if not livekit:
+        raise HTTPException(status_code=503, detail="LiveKit service unavailable")
+    return livekit
+
+@app.get("/", response_class=HTMLResponse)
+async def homepage():
+    """Simple homepage with meeting creation"""
+    return Response(content=_HOMEPAGE_BYTES, headers=_HOMEPAGE_HEADERS)
 
 @app.post("/api/create-simple-meeting")
 async def create_simple_meeting():
@@ -149,11 +215,11 @@ async def create_simple_meeting():
     meeting_id = generate_meeting_id()
     
     # Store meeting
-    meetings[meeting_id] = {
-        "meeting_id": meeting_id,
-        "created_at": datetime.utcnow().isoformat(),
-        "participants": []
-    }
+    with meetings_lock:
+        meetings[meeting_id] = SimpleMeeting(
+            meeting_id=meeting_id,
+            created_at=datetime.utcnow().isoformat()
+        )
     
     logger.info(f"Created simple meeting: {meeting_id}")
     
@@ -171,17 +237,17 @@ async def join_meeting(
 ):
     """Join a meeting"""
     # Check if meeting exists
-    if meeting_id not in meetings:
+    meeting = get_meeting(meeting_id)
+    if meeting is None:
         raise HTTPException(status_code=404, detail="Meeting not found")
     
-    meeting = meetings[meeting_id]
-    
     # Generate LiveKit token
     room_name = f"meeting-{meeting_id}"
     is_host = request.participant_role == "doctor"
     
     try:
-        token = livekit_client.generate_token(
+        token = await run_in_threadpool(
+            livekit_client.generate_token,
             room_name=room_name,
             participant_name=request.participant_name,
             is_host=is_host
@@ -193,7 +259,9 @@ async def join_meeting(
             "role": request.participant_role,
             "joined_at": datetime.utcnow().isoformat()
         }
-        meeting["participants"].append(participant_info)
+        with meetings_lock:
+            meeting.add_participant(participant_info)
+            participants_count = len(meeting.participants)
         
         logger.info(f"Participant {request.participant_name} joined meeting {meeting_id} as {request.participant_role}")
         
@@ -202,7 +270,7 @@ async def join_meeting(
             meeting_url=f"/simple-meeting/{meeting_id}",
             livekit_url=livekit_client.url,
             token=token,
-            participants_count=len(meeting["participants"]),
+            participants_count=participants_count,
             user_role=request.participant_role
         )
         
@@ -214,28 +282,15 @@ async def join_meeting(
 async def simple_meeting_room(meeting_id: str):
     """Serve the simple meeting room"""
     # Check if meeting exists
-    if meeting_id not in meetings:
+    if get_meeting(meeting_id) is None:
         return HTMLResponse(
-            content=f"""
-            <html>
-            <head><title>Meeting nicht gefunden</title></head>
-            <body style="font-family: Arial; text-align: center; padding: 50px;">
-                <h1>❌ Meeting nicht gefunden</h1>
-                <p>Meeting ID: {meeting_id}</p>
-                <p>Das Meeting existiert nicht oder ist abgelaufen.</p>
-                <a href="/" style="background: #4285f4; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">
-                    Zur Homepage
-                </a>
-            </body>
-            </html>
-            """,
+            content=_NOT_FOUND_TEMPLATE.format(meeting_id=meeting_id),
             status_code=404
         )
     
     # Load the simple meeting HTML
     try:
-        with open("frontend/simple_meeting.html", "r", encoding="utf-8") as f:
-            html_content = f.read()
+        html_content = read_frontend_file("frontend/simple_meeting.html")
         return HTMLResponse(content=html_content)
     except FileNotFoundError:
         return HTMLResponse(
@@ -256,8 +311,7 @@ async def simple_meeting_room(meeting_id: str):
 async def serve_simple_meeting_js():
     """Serve the simple meeting JavaScript"""
     try:
-        with open("frontend/simple_meeting.js", "r", encoding="utf-8") as f:
-            js_content = f.read()
+        js_content = read_frontend_file("frontend/simple_meeting.js")
         return Response(content=js_content, media_type="application/javascript")
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="JavaScript file not found")
@@ -265,23 +319,27 @@ async def serve_simple_meeting_js():
 @app.get("/api/meetings/{meeting_id}/info")
 async def get_meeting_info(meeting_id: str):
     """Get meeting information"""
-    if meeting_id not in meetings:
+    meeting = get_meeting(meeting_id)
+    if meeting is None:
         raise HTTPException(status_code=404, detail="Meeting not found")
     
-    meeting = meetings[meeting_id]
     return {
         "meeting_id": meeting_id,
         "livekit_url": livekit.url if livekit else None,
-        "participants_count": len(meeting.get("participants", [])),
-        "created_at": meeting.get("created_at")
+        "participants_count": len(meeting.participants),
+        "created_at": meeting.created_at
     }
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    with meetings_lock:
+        meetings.expire()
+        meetings_count = len(meetings)
+    
     return {
         "status": "healthy",
-        "meetings_count": len(meetings),
+        "meetings_count": meetings_count,
         "livekit_connected": livekit is not None,
         "timestamp": datetime.utcnow().isoformat()
     }
@@ -1,10 +1,27 @@
 import asyncio
+import logging
+import operator
 from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from apscheduler.events import (
+    EVENT_JOB_ADDED,
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_MODIFIED,
+    EVENT_JOB_REMOVED,
+    EVENT_JOB_SUBMITTED
+)
+from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy import text
 
-from database import get_db
+from database import BackgroundSession, background_engine
+from livekit_client import LiveKitClient
 from services.meeting_service import MeetingService
 from utils.logger import get_logger
 from config import get_settings
@@ -12,12 +29,41 @@ from config import get_settings
 logger = get_logger(__name__)
 settings = get_settings()
 
+# Health probe cadence; consecutive failures back off exponentially up to the cap
+HEALTH_CHECK_INTERVAL_SECONDS = 300
+HEALTH_CHECK_MAX_INTERVAL_SECONDS = 3600
+
+_job_fields = operator.attrgetter("id", "name", "next_run_time")
+
 class BackgroundTasks:
     """Background task manager for HeyDok"""
     
     def __init__(self):
-        self.scheduler = AsyncIOScheduler()
+        # Jobs run as coroutines on the loop and hand blocking work to worker
+        # threads; at most one run per job, and missed runs collapse into one
+        # instead of firing in a burst
+        self.scheduler = AsyncIOScheduler(
+            jobstores={"default": MemoryJobStore()},
+            executors={"default": AsyncIOExecutor()},
+            job_defaults={
+                "coalesce": True,
+                "max_instances": 1,
+                "misfire_grace_time": 30
+            }
+        )
+        # next_run_time advances when a job is submitted (or skipped at
+        # max_instances) without a MODIFIED event, so listen for those too
+        self._jobs_status_cache = None
+        self.scheduler.add_listener(
+            self._invalidate_jobs_status,
+            EVENT_JOB_ADDED | EVENT_JOB_REMOVED | EVENT_JOB_MODIFIED
+            | EVENT_JOB_SUBMITTED | EVENT_JOB_MAX_INSTANCES
+            | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED
+        )
         self.is_running = False
+        self._livekit = None
+        self._last_cleanup_at: Optional[datetime] = None
+        self._consecutive_failures = 0
     
     async def start(self):
         """Start background task scheduler"""
@@ -27,35 +73,41 @@ class BackgroundTasks:
         
         logger.info("Starting background tasks...")
         
-        # Schedule cleanup tasks
-        self.scheduler.add_job(
-            self.cleanup_expired_meetings,
-            trigger=IntervalTrigger(minutes=settings.cleanup_interval_minutes),
-            id="cleanup_meetings",
-            name="Cleanup Expired Meetings",
-            replace_existing=True
+        # Scheduled jobs: (callable, trigger, id, name)
+        jobs = (
+            (
+                self.cleanup_expired_meetings,
+                IntervalTrigger(minutes=settings.cleanup_interval_minutes),
+                "cleanup_meetings",
+                "Cleanup Expired Meetings"
+            ),
+            (
+                self.daily_maintenance,
+                CronTrigger(hour=2, minute=0),  # 2 AM daily
+                "daily_maintenance",
+                "Daily Maintenance"
+            ),
+            (
+                self.health_check,
+                IntervalTrigger(seconds=HEALTH_CHECK_INTERVAL_SECONDS),
+                "health_check",
+                "Health Check"
+            ),
         )
         
-        # Schedule daily maintenance
-        self.scheduler.add_job(
-            self.daily_maintenance,
-            trigger=CronTrigger(hour=2, minute=0),  # 2 AM daily
-            id="daily_maintenance",
-            name="Daily Maintenance",
-            replace_existing=True
-        )
-        
-        # Schedule health monitoring
-        self.scheduler.add_job(
-            self.health_check,
-            trigger=IntervalTrigger(minutes=5),
-            id="health_check",
-            name="Health Check",
-            replace_existing=True
-        )
+        # Before start() these are queued and written to the job store together
+        for func, trigger, job_id, name in jobs:
+            self.scheduler.add_job(
+                func,
+                trigger=trigger,
+                id=job_id,
+                name=name,
+                replace_existing=True
+            )
         
         # Start scheduler
         self.scheduler.start()
+        self._invalidate_jobs_status()
         self.is_running = True
         
         logger.info("Background tasks started successfully")
@@ -67,79 +119,112 @@ class BackgroundTasks:
         
         logger.info("Stopping background tasks...")
         self.scheduler.shutdown(wait=True)
+        self._invalidate_jobs_status()
         self.is_running = False
         logger.info("Background tasks stopped")
     
+    def _invalidate_jobs_status(self, event=None):
+        """Drop the serialized job list; next_run_time or the job set changed"""
+        self._jobs_status_cache = None
+    
+    def get_jobs_status(self):
+        """Serialized scheduled jobs, rebuilt only after scheduler events"""
+        if self._jobs_status_cache is None:
+            self._jobs_status_cache = [
+                {
+                    "id": job_id,
+                    "name": name,
+                    "next_run": next_run_time.isoformat() if next_run_time else None
+                }
+                for job_id, name, next_run_time in map(_job_fields, self.scheduler.get_jobs())
+            ]
+        return self._jobs_status_cache
+    
+    def _cleanup_expired_meetings_sync(self) -> int:
+        """Blocking part of the cleanup, run in a worker thread"""
+        with BackgroundSession() as db:
+            return MeetingService(db).cleanup_expired_meetings()
+    
     async def cleanup_expired_meetings(self):
         """Clean up expired meetings and related data"""
         try:
             logger.debug("Starting expired meetings cleanup...")
             
-            db = next(get_db())
-            meeting_service = MeetingService(db)
-            
-            cleaned_count = meeting_service.cleanup_expired_meetings()
+            # The delete batches are blocking DB calls; run them in a worker
+            # thread so the loop keeps serving requests and health ticks
+            cleaned_count = await asyncio.to_thread(self._cleanup_expired_meetings_sync)
+            self._last_cleanup_at = datetime.utcnow()
             
             if cleaned_count > 0:
-                logger.info(f"Cleaned up {cleaned_count} expired meetings")
+                logger.info("Cleaned up %d expired meetings", cleaned_count)
             else:
                 logger.debug("No expired meetings to clean up")
                 
         except Exception as e:
-            logger.error(f"Error in cleanup_expired_meetings: {str(e)}", exc_info=True)
-        finally:
-            if 'db' in locals():
-                db.close()
+            logger.error("Error in cleanup_expired_meetings: %s", e, exc_info=True)
     
     async def daily_maintenance(self):
         """Perform daily maintenance tasks"""
         try:
             logger.info("Starting daily maintenance...")
             
-            # Cleanup expired meetings (redundant but safe)
-            await self.cleanup_expired_meetings()
+            # Log statistics and clean up old log files (if applicable)
+            subtasks = [self.log_daily_stats(), self.cleanup_old_logs()]
             
-            # Log statistics
-            await self.log_daily_stats()
+            # Cleanup expired meetings, unless the interval job ran recently
+            if not self._cleaned_up_within(timedelta(minutes=settings.cleanup_interval_minutes)):
+                subtasks.append(self.cleanup_expired_meetings())
             
-            # Clean up old log files (if applicable)
-            await self.cleanup_old_logs()
+            # Independent concerns; one failing does not skip the others
+            results = await asyncio.gather(*subtasks, return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error("Daily maintenance subtask failed: %s", result, exc_info=result)
             
             logger.info("Daily maintenance completed")
             
         except Exception as e:
-            logger.error(f"Error in daily_maintenance: {str(e)}", exc_info=True)
+            logger.error("Error in daily_maintenance: %s", e, exc_info=True)
+    
+    def _cleaned_up_within(self, window: timedelta) -> bool:
+        """Whether a successful cleanup finished within the given window"""
+        return (
+            self._last_cleanup_at is not None
+            and datetime.utcnow() - self._last_cleanup_at < window
+        )
     
     async def log_daily_stats(self):
         """Log daily statistics"""
+        # The counts exist only for this log line; skip the queries if it would be dropped
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
         try:
-            db = next(get_db())
-            meeting_service = MeetingService(db)
-            
-            active_meetings = meeting_service.get_active_meetings()
-            total_meetings = len(active_meetings)
-            
             # Get meetings from last 24 hours
-            yesterday = datetime.utcnow() - timedelta(days=1)
-            recent_meetings = [
-                m for m in active_meetings 
-                if m.created_at >= yesterday
-            ]
+            now = datetime.utcnow()
+            yesterday = now - timedelta(days=1)
+            
+            total_meetings, recent_meetings = await asyncio.to_thread(
+                self._count_meetings_sync, yesterday
+            )
             
             logger.info(
                 "Daily statistics",
                 extra={
                     "total_active_meetings": total_meetings,
-                    "meetings_last_24h": len(recent_meetings),
-                    "timestamp": datetime.utcnow().isoformat()
+                    "meetings_last_24h": recent_meetings,
+                    "timestamp": now.isoformat()
                 }
             )
             
         except Exception as e:
-            logger.error(f"Error logging daily stats: {str(e)}")
-        finally:
-            if 'db' in locals():
-                db.close()
+            logger.error("Error logging daily stats: %s", e)
+    
+    def _count_meetings_sync(self, since: datetime) -> Tuple[int, int]:
+        """Blocking COUNT queries for the daily stats, run in a worker thread"""
+        with BackgroundSession() as db:
+            meeting_service = MeetingService(db)
+            return meeting_service.count_active(), meeting_service.count_created_since(since)
     
     async def cleanup_old_logs(self):
         """Clean up old log files (if using file logging)"""
@@ -149,30 +234,62 @@ class BackgroundTasks:
             logger.debug("Log cleanup check completed")
             
         except Exception as e:
-            logger.error(f"Error in log cleanup: {str(e)}")
+            logger.error("Error in log cleanup: %s", e)
     
     async def health_check(self):
         """Perform periodic health checks"""
         try:
-            # Check database connectivity
-            db = next(get_db())
-            db.execute("SELECT 1")
-            
-            # Check LiveKit credentials (light check)
-            from livekit_client import LiveKitClient
-            livekit = LiveKitClient()
-            is_valid = livekit.validate_credentials()
+            # The pool checkout and LiveKit client block; keep them off the loop
+            is_valid = await asyncio.to_thread(self._health_probe_sync)
             
             if not is_valid:
                 logger.warning("LiveKit credentials validation failed during health check")
             
             logger.debug("Health check completed successfully")
+            self._record_health_result(is_valid)
             
         except Exception as e:
-            logger.error(f"Health check failed: {str(e)}", exc_info=True)
-        finally:
-            if 'db' in locals():
-                db.close()
+            logger.error("Health check failed: %s", e, exc_info=True)
+            self._record_health_result(False)
+    
+    def _health_probe_sync(self) -> bool:
+        """Blocking part of the health check, run in a worker thread"""
+        # Check database connectivity; a checkout is enough since the
+        # background pool pre-pings connections
+        with background_engine.connect() as conn:
+            if settings.health_check_strict:
+                conn.execute(text("SELECT 1"))
+        
+        # Check LiveKit credentials (light check)
+        return self._get_livekit_client().validate_credentials()
+    
+    def _get_livekit_client(self) -> LiveKitClient:
+        """Create the LiveKit client on first use and keep it"""
+        if self._livekit is None:
+            self._livekit = LiveKitClient()
+        return self._livekit
+    
+    def _record_health_result(self, ok: bool):
+        """Track probe outcome and back the health_check job off while failing"""
+        previous_failures = self._consecutive_failures
+        
+        if ok:
+            self._consecutive_failures = 0
+        else:
+            self._consecutive_failures += 1
+        
+        if not self.is_running or self._consecutive_failures == previous_failures:
+            return
+        
+        interval = min(
+            HEALTH_CHECK_INTERVAL_SECONDS * 2 ** self._consecutive_failures,
+            HEALTH_CHECK_MAX_INTERVAL_SECONDS
+        ) if self._consecutive_failures else HEALTH_CHECK_INTERVAL_SECONDS
+        
+        self.scheduler.reschedule_job(
+            "health_check", trigger=IntervalTrigger(seconds=interval)
+        )
+        logger.debug("Health check interval set to %ss", interval)
 
 # Global task manager instance
 task_manager = BackgroundTasks()
@@ -197,12 +314,5 @@ def get_task_status():
     """Get current status of background tasks"""
     return {
         "is_running": task_manager.is_running,
-        "scheduled_jobs": [
-            {
-                "id": job.id,
-                "name": job.name,
-                "next_run": job.next_run_time.isoformat() if job.next_run_time else None
-            }
-            for job in task_manager.scheduler.get_jobs()
-        ] if task_manager.is_running else []
+        "scheduled_jobs": task_manager.get_jobs_status() if task_manager.is_running else []
     } 
\ No newline at end of file
@@ -4,16 +4,21 @@ Test Script für EasyOCR Insurance Card Service
 Lokaler Test der neuen EasyOCR-Implementierung
 """
 
+import atexit
 import os
 import sys
 import logging
+import functools
+import io
+import mmap
+import re
 from pathlib import Path
 
 # Add project root to path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from services.insurance_card_service import InsuranceCardService
+from services.insurance_card_service import InsuranceCardService, _detect_company
 from database import SessionLocal
 
 # Configure logging
@@ -22,40 +27,104 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png'}
+
+# The original one-search-per-insurer loop, kept as the reference for _detect_company
+_REFERENCE_COMPANY_PATTERNS = [
+    (r'(?:AOK|A\.O\.K\.?)', 'AOK'),
+    (r'(?:TK|Techniker|TECHNIKER)', 'Techniker Krankenkasse'),
+    (r'(?:BARMER|Barmer)', 'Barmer'),
+    (r'(?:DAK|DAK-Gesundheit)', 'DAK-Gesundheit'),
+    (r'(?:IKK|Innungskrankenkasse)', 'IKK'),
+    (r'(?:HEK|Hanseatische)', 'HEK'),
+    (r'(?:KKH|Kaufmännische)', 'KKH'),
+    (r'(?:Knappschaft)', 'Knappschaft'),
+]
+
+COMPANY_SAMPLES = [
+    "AOK Bayern Max Mustermann",
+    "Techniker Krankenkasse A123456789",
+    "kaufmännischekkh",
+    "hanseatischeKKH",
+    "dak-gesundheit barmer",
+    "IKK classic knappschaft",
+    "a.o.k. ikkh",
+    "Erika Musterfrau 1234567890",
+    "",
+]
+
+# Report lines are collected here and written to stdout once per test
+_report_buffer = io.StringIO()
+
+def report(line: str = "") -> None:
+    """Queue a report line for the next flush_report()"""
+    _report_buffer.write(line)
+    _report_buffer.write("\n")
+
+def flush_report() -> None:
+    """Write all queued report lines to stdout in one call"""
+    sys.stdout.write(_report_buffer.getvalue())
+    sys.stdout.flush()
+    _report_buffer.seek(0)
+    _report_buffer.truncate()
+
+@functools.lru_cache(maxsize=1)
+def get_service() -> InsuranceCardService:
+    """Build the service once so all tests share one loaded EasyOCR model"""
+    db = SessionLocal()
+    atexit.register(db.close)
+    return InsuranceCardService(db)
+
 def test_easyocr_installation():
     """Test if EasyOCR is properly installed and working"""
     try:
         import easyocr
-        print("✅ EasyOCR import successful")
+        report("✅ EasyOCR import successful")
         
-        # Test reader initialization
+        # Test reader initialization on its own, independent of the service
         reader = easyocr.Reader(['en'], gpu=False, verbose=False)
-        print("✅ EasyOCR Reader initialization successful")
+        report("✅ EasyOCR Reader initialization successful")
         
         return True
     except Exception as e:
-        print(f"❌ EasyOCR installation test failed: {e}")
+        report(f"❌ EasyOCR installation test failed: {e}")
         return False
 
 def test_service_initialization():
     """Test InsuranceCardService initialization"""
     try:
-        db = SessionLocal()
-        service = InsuranceCardService(db)
-        print("✅ InsuranceCardService initialization successful")
+        service = get_service()
+        report("✅ InsuranceCardService initialization successful")
         
         if service.reader:
-            print("✅ EasyOCR reader successfully initialized in service")
+            report("✅ EasyOCR reader successfully initialized in service")
         else:
-            print("❌ EasyOCR reader failed to initialize in service")
+            report("❌ EasyOCR reader failed to initialize in service")
             return False
             
-        db.close()
         return True
     except Exception as e:
-        print(f"❌ Service initialization failed: {e}")
+        report(f"❌ Service initialization failed: {e}")
         return False
 
+def test_company_detection():
+    """Check that insurer detection picks the same company as the original loop"""
+    mismatches = 0
+    for text in COMPANY_SAMPLES:
+        expected = next(
+            (name for pattern, name in _REFERENCE_COMPANY_PATTERNS if re.search(pattern, text, re.IGNORECASE)),
+            ''
+        )
+        detected = _detect_company(text)
+        if detected != expected:
+            report(f"❌ {text!r}: expected {expected!r}, got {detected!r}")
+            mismatches += 1
+    
+    if mismatches:
+        return False
+    report(f"✅ Insurer detection matches the reference on {len(COMPANY_SAMPLES)} samples")
+    return True
+
 def test_with_sample_image():
     """Test OCR with a sample image if available"""
     try:
@@ -63,92 +132,95 @@ def test_with_sample_image():
         uploads_dir = project_root / "uploads"
         
         if not uploads_dir.exists():
-            print("ℹ️  No uploads directory found - skipping image test")
+            report("ℹ️  No uploads directory found - skipping image test")
             return True
             
-        # Find any image files
-        image_files = []
-        for ext in ['*.jpg', '*.jpeg', '*.png']:
-            image_files.extend(uploads_dir.glob(ext))
+        # Find the first image file in a single directory pass
+        test_image = next(
+            (
+                Path(entry.path) for entry in os.scandir(uploads_dir)
+                if entry.is_file() and Path(entry.name).suffix.lower() in IMAGE_SUFFIXES
+            ),
+            None
+        )
         
-        if not image_files:
-            print("ℹ️  No test images found - skipping image test")
+        if test_image is None:
+            report("ℹ️  No test images found - skipping image test")
             return True
             
         # Test with first found image
-        test_image = image_files[0]
-        print(f"🔍 Testing with image: {test_image.name}")
-        
-        db = SessionLocal()
-        service = InsuranceCardService(db)
+        report(f"🔍 Testing with image: {test_image.name}")
         
-        with open(test_image, 'rb') as f:
-            image_bytes = f.read()
+        service = get_service()
         
-        result = service.extract_card_data(image_bytes)
+        # Map the file instead of copying it into a bytes object
+        with open(test_image, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as image_buffer:
+            result = service.extract_card_data(image_buffer)
         
-        print("📋 OCR Test Results:")
-        print(f"   Success: {result.get('success', False)}")
-        print(f"   Confidence: {result.get('confidence', 0):.3f}")
-        print(f"   Approach: {result.get('approach_used', 'N/A')}")
+        report("📋 OCR Test Results:")
+        report(f"   Success: {result.get('success', False)}")
+        report(f"   Confidence: {result.get('confidence', 0):.3f}")
+        report(f"   Approach: {result.get('approach_used', 'N/A')}")
         
         if result.get('success'):
             data = result.get('data', {})
-            print("   Extracted Data:")
+            report("   Extracted Data:")
             for key, value in data.items():
                 if value:
-                    print(f"     {key}: {value}")
+                    report(f"     {key}: {value}")
         else:
-            print(f"   Error: {result.get('error', 'Unknown error')}")
+            report(f"   Error: {result.get('error', 'Unknown error')}")
         
-        db.close()
         return True
         
     except Exception as e:
-        print(f"❌ Image test failed: {e}")
+        report(f"❌ Image test failed: {e}")
         return False
 
 def main():
     """Run all tests"""
-    print("🚀 Starting EasyOCR Implementation Tests\n")
+    report("🚀 Starting EasyOCR Implementation Tests\n")
     
     tests = [
         ("EasyOCR Installation", test_easyocr_installation),
         ("Service Initialization", test_service_initialization),
+        ("Insurer Detection", test_company_detection),
         ("Sample Image Processing", test_with_sample_image),
     ]
     
     results = []
     
     for test_name, test_func in tests:
-        print(f"Running: {test_name}")
+        report(f"Running: {test_name}")
         try:
             success = test_func()
             results.append((test_name, success))
             if success:
-                print(f"✅ {test_name} passed\n")
+                report(f"✅ {test_name} passed\n")
             else:
-                print(f"❌ {test_name} failed\n")
+                report(f"❌ {test_name} failed\n")
         except Exception as e:
-            print(f"❌ {test_name} crashed: {e}\n")
+            report(f"❌ {test_name} crashed: {e}\n")
             results.append((test_name, False))
+        flush_report()
     
     # Summary
-    print("📊 Test Summary:")
-    passed = sum(1 for _, success in results if success)
+    report("📊 Test Summary:")
+    passed = sum(success for _, success in results)
     total = len(results)
     
     for test_name, success in results:
         status = "✅ PASS" if success else "❌ FAIL"
-        print(f"   {status}: {test_name}")
+        report(f"   {status}: {test_name}")
     
-    print(f"\n🎯 Results: {passed}/{total} tests passed")
+    report(f"\n🎯 Results: {passed}/{total} tests passed")
     
     if passed == total:
-        print("🎉 All tests passed! EasyOCR implementation is ready.")
+        report("🎉 All tests passed! EasyOCR implementation is ready.")
     else:
-        print("⚠️  Some tests failed. Check the logs above.")
+        report("⚠️  Some tests failed. Check the logs above.")
     
+    flush_report()
     return passed == total
 
 if __name__ == "__main__":
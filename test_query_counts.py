@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Query count checks for MeetingService
+Guards the hot meeting lookups against N+1 regressions on a throwaway SQLite database
+"""
+
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+# Point the app at a scratch database before database.py creates its engine
+_scratch_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_scratch_dir.name}/query_counts.db"
+
+# Add project root to path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import event
+
+from database import SessionLocal, engine
+from services.meeting_service import MeetingService
+
+@contextmanager
+def count_queries():
+    """Collect every SQL statement executed on the engine inside the block"""
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+def check(label: str, statements: list, limit: int, exact: bool = False) -> bool:
+    """Print one result line and return whether the count is within bounds"""
+    ok = len(statements) == limit if exact else len(statements) <= limit
+    bound = f"== {limit}" if exact else f"<= {limit}"
+    print(f"{'✅' if ok else '❌'} {label}: {len(statements)} queries (expected {bound})")
+    if not ok:
+        for statement in statements:
+            print(f"     {' '.join(statement.split())[:120]}")
+    return ok
+
+def main():
+    """Run all query count checks"""
+    print("🚀 Starting MeetingService query count checks\n")
+
+    results = []
+
+    with SessionLocal() as db:
+        meeting_id = MeetingService(db).create_meeting(host_name="Dr. Test").meeting_id
+
+    # A fresh session per check so nothing is served from the identity map
+    with SessionLocal() as db, count_queries() as statements:
+        MeetingService(db).get_meeting(meeting_id)
+    results.append(check("get_meeting", statements, 1, exact=True))
+
+    for method in ("mark_patient_setup_completed", "mark_document_uploaded", "mark_media_test_completed"):
+        with SessionLocal() as db, count_queries() as statements:
+            getattr(MeetingService(db), method)(meeting_id)
+        results.append(check(method, statements, 1))
+
+    with SessionLocal() as db, count_queries() as statements:
+        MeetingService(db).get_meeting_status(meeting_id)
+    results.append(check("get_meeting_status", statements, 1, exact=True))
+
+    passed = sum(results)
+    print(f"\n🎯 Results: {passed}/{len(results)} checks passed")
+    return passed == len(results)
+
+if __name__ == "__main__":
+    success = main()
+    engine.dispose()
+    _scratch_dir.cleanup()
+    sys.exit(0 if success else 1)
@@ -15,8 +15,15 @@ class HeyDokException(Exception):
     ):
         self.message = message
         self.error_code = error_code or self.__class__.__name__
-        self.extra_data = extra_data or {}
+        self._extra_data = extra_data
         super().__init__(message)
+    
+    @property
+    def extra_data(self) -> Dict[str, Any]:
+        """Extra context; the empty dict is only allocated when someone reads it"""
+        if self._extra_data is None:
+            self._extra_data = {}
+        return self._extra_data
 
 class ValidationError(HeyDokException):
     """Raised when input validation fails"""
@@ -162,58 +169,74 @@ class ConfigurationError(HeyDokException):
             extra_data={"config_key": config_key, "expected": expected}
         )
 
+# Map exception types to HTTP status codes
+_STATUS_MAP: Dict[type, int] = {
+    MeetingNotFoundError: status.HTTP_404_NOT_FOUND,
+    MeetingExpiredError: status.HTTP_410_GONE,
+    MeetingFullError: status.HTTP_409_CONFLICT,
+    ValidationError: status.HTTP_422_UNPROCESSABLE_ENTITY,
+    DocumentUploadError: status.HTTP_400_BAD_REQUEST,
+    MediaTestError: status.HTTP_400_BAD_REQUEST,
+    LiveKitConnectionError: status.HTTP_503_SERVICE_UNAVAILABLE,
+    TokenGenerationError: status.HTTP_500_INTERNAL_SERVER_ERROR,
+    ConfigurationError: status.HTTP_500_INTERNAL_SERVER_ERROR,
+}
+_DEFAULT_STATUS = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+def _status_for(exc_type: type) -> int:
+    """Status for an exception type, falling back to its nearest mapped base class"""
+    status_code = _STATUS_MAP.get(exc_type)
+    if status_code is None:
+        status_code = next(
+            (_STATUS_MAP[base] for base in exc_type.__mro__[1:] if base in _STATUS_MAP),
+            _DEFAULT_STATUS
+        )
+        # Remember the resolution so each subclass walks its MRO only once
+        _STATUS_MAP[exc_type] = status_code
+    return status_code
+
 def exception_to_http_exception(exc: HeyDokException) -> HTTPException:
     """Convert HeyDok exception to FastAPI HTTPException"""
     
-    # Map exception types to HTTP status codes
-    status_map = {
-        MeetingNotFoundError: status.HTTP_404_NOT_FOUND,
-        MeetingExpiredError: status.HTTP_410_GONE,
-        MeetingFullError: status.HTTP_409_CONFLICT,
-        ValidationError: status.HTTP_422_UNPROCESSABLE_ENTITY,
-        DocumentUploadError: status.HTTP_400_BAD_REQUEST,
-        MediaTestError: status.HTTP_400_BAD_REQUEST,
-        LiveKitConnectionError: status.HTTP_503_SERVICE_UNAVAILABLE,
-        TokenGenerationError: status.HTTP_500_INTERNAL_SERVER_ERROR,
-        ConfigurationError: status.HTTP_500_INTERNAL_SERVER_ERROR,
-    }
-    
     # Default to 500 for unknown exceptions
-    status_code = status_map.get(type(exc), status.HTTP_500_INTERNAL_SERVER_ERROR)
+    status_code = _status_for(type(exc))
     
     # Log the exception
-    logger.error(
-        f"Exception occurred: {exc.error_code}",
-        extra={
-            "error_code": exc.error_code,
-            "message": exc.message,
-            "extra_data": exc.extra_data,
-            "exception_type": type(exc).__name__
-        }
-    )
+    if logger.isEnabledFor(logging.ERROR):
+        logger.error(
+            "Exception occurred: %s",
+            exc.error_code,
+            extra={
+                "error_code": exc.error_code,
+                "error_message": exc.message,
+                "extra_data": exc._extra_data or {},
+                "exception_type": type(exc).__name__
+            }
+        )
     
     return HTTPException(
         status_code=status_code,
         detail={
             "error_code": exc.error_code,
             "message": exc.message,
-            "extra_data": exc.extra_data
+            "extra_data": exc._extra_data or {}
         }
     )
 
 def handle_unexpected_exception(exc: Exception, context: str = None) -> HTTPException:
     """Handle unexpected exceptions with proper logging"""
     
-    context_info = f" in {context}" if context else ""
-    
-    logger.error(
-        f"Unexpected exception{context_info}: {str(exc)}",
-        exc_info=True,
-        extra={
-            "exception_type": type(exc).__name__,
-            "context": context
-        }
-    )
+    if logger.isEnabledFor(logging.ERROR):
+        logger.error(
+            "Unexpected exception%s: %s",
+            f" in {context}" if context else "",
+            exc,
+            exc_info=True,
+            extra={
+                "exception_type": type(exc).__name__,
+                "context": context
+            }
+        )
     
     return HTTPException(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,10 @@
+import random
+import string
+
+# Meeting IDs end up in shareable URLs, so draw them from the OS CSPRNG
+_ID_ALPHABET = string.ascii_lowercase + string.digits
+_ID_RNG = random.SystemRandom()
+
+def random_id(length: int) -> str:
+    """Random lowercase alphanumeric string of the given length"""
+    return ''.join(_ID_RNG.choices(_ID_ALPHABET, k=length))
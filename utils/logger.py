@@ -1,72 +1,111 @@
+import functools
 import logging
 import sys
-from datetime import datetime
+import threading
+from datetime import datetime, timezone
+from contextvars import ContextVar
+from types import SimpleNamespace
 from typing import Dict, Any
 import json
 import os
 
+# Optional fast encoder; stdlib json is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _json_default(value):
+    """Render UTC datetimes with a Z suffix, matching orjson"""
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+    
+    def _dumps(log_entry: Dict[str, Any]) -> str:
+        return orjson.dumps(log_entry, option=_ORJSON_OPTIONS).decode()
+else:
+    def _dumps(log_entry: Dict[str, Any]) -> str:
+        return json.dumps(log_entry, default=_json_default)
+
 class JSONFormatter(logging.Formatter):
     """Custom JSON formatter for structured logging"""
     
     def format(self, record):
+        attrs = record.__dict__
+        
+        # Records logged without args need no %-formatting
+        message = str(record.msg) if not record.args else record.getMessage()
+        
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "level": record.levelname,
-            "logger": record.name,
-            "message": record.getMessage(),
-            "module": record.module,
-            "function": record.funcName,
-            "line": record.lineno
+            "timestamp": datetime.now(timezone.utc),
+            "level": attrs["levelname"],
+            "logger": attrs["name"],
+            "message": message,
+            "module": attrs["module"],
+            "function": attrs["funcName"],
+            "line": attrs["lineno"]
         }
         
         # Add exception info if present
-        if record.exc_info:
-            log_entry["exception"] = self.formatException(record.exc_info)
+        if attrs["exc_info"]:
+            log_entry["exception"] = self.formatException(attrs["exc_info"])
         
         # Add extra fields if present
-        if hasattr(record, 'extra_data'):
-            log_entry["extra"] = record.extra_data
+        if "extra_data" in attrs:
+            log_entry["extra"] = attrs["extra_data"]
             
         # Add request context if available
-        if hasattr(record, 'request_id'):
-            log_entry["request_id"] = record.request_id
+        if "request_id" in attrs:
+            log_entry["request_id"] = attrs["request_id"]
             
-        if hasattr(record, 'user_id'):
-            log_entry["user_id"] = record.user_id
+        if "user_id" in attrs:
+            log_entry["user_id"] = attrs["user_id"]
             
-        return json.dumps(log_entry)
+        return _dumps(log_entry)
+
+@functools.cache
+def _config() -> SimpleNamespace:
+    """Logging settings resolved from the environment once (cache_clear() to re-read)"""
+    return SimpleNamespace(
+        level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO),
+        is_production=os.getenv("ENVIRONMENT") == "production"
+    )
 
 def setup_logging():
     """Setup application logging with both console and structured output"""
     
     # Determine log level from environment
-    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+    config = _config()
+    log_level = config.level
     
     # Create formatters
     console_formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
-    json_formatter = JSONFormatter()
     
     # Setup console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(console_formatter)
-    console_handler.setLevel(getattr(logging, log_level))
-    
-    # Setup JSON handler for production logs
-    json_handler = logging.StreamHandler(sys.stderr)
-    json_handler.setFormatter(json_formatter)
-    json_handler.setLevel(logging.WARNING)  # Only warnings and errors in JSON
+    console_handler.setLevel(log_level)
     
     # Configure root logger
     root_logger = logging.getLogger()
-    root_logger.setLevel(getattr(logging, log_level))
+    root_logger.setLevel(log_level)
     root_logger.addHandler(console_handler)
     
     # Add JSON handler in production
-    if os.getenv("ENVIRONMENT") == "production":
+    if config.is_production:
+        json_handler = logging.StreamHandler(sys.stderr)
+        json_handler.setFormatter(JSONFormatter())
+        json_handler.setLevel(logging.WARNING)  # Only warnings and errors in JSON
         root_logger.addHandler(json_handler)
     
+    # Copy LogContext values onto records
+    _install_context_factory()
+    
     # Reduce noise from external libraries
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
@@ -77,26 +116,46 @@ def get_logger(name: str) -> logging.Logger:
     """Get a logger instance with the given name"""
     return logging.getLogger(name)
 
+# Per-task/thread log context; read by a record factory that is chained in
+# front of the existing one on first use rather than at import
+_log_context: ContextVar[Dict[str, Any]] = ContextVar("heydok_log_context", default={})
+_base_record_factory = logging.getLogRecordFactory()
+_context_factory_installed = False
+_context_factory_lock = threading.Lock()
+
+def _context_record_factory(*args, **kwargs):
+    record = _base_record_factory(*args, **kwargs)
+    context = _log_context.get()
+    if context:
+        record.__dict__.update(context)
+    return record
+
+def _install_context_factory():
+    """Wrap whatever LogRecord factory is current at the time, once per process"""
+    global _base_record_factory, _context_factory_installed
+    with _context_factory_lock:
+        if not _context_factory_installed:
+            _base_record_factory = logging.getLogRecordFactory()
+            logging.setLogRecordFactory(_context_record_factory)
+            _context_factory_installed = True
+
 class LogContext:
     """Context manager for adding extra context to logs"""
     
     def __init__(self, logger: logging.Logger, **context):
         self.logger = logger
         self.context = context
-        self.old_factory = logging.getLogRecordFactory()
+        self._token = None
     
     def __enter__(self):
-        def record_factory(*args, **kwargs):
-            record = self.old_factory(*args, **kwargs)
-            for key, value in self.context.items():
-                setattr(record, key, value)
-            return record
-        
-        logging.setLogRecordFactory(record_factory)
+        # Not every entry point calls setup_logging()
+        if not _context_factory_installed:
+            _install_context_factory()
+        self._token = _log_context.set({**_log_context.get(), **self.context})
         return self.logger
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        logging.setLogRecordFactory(self.old_factory)
+        _log_context.reset(self._token)
 
 # Business logic loggers
 api_logger = get_logger("heydok.api")